@@ -1,7 +1,8 @@
-import subprocess
+import asyncio
 import os
 import logging
 import platform
+import signal
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
@@ -16,13 +17,90 @@ WORKSPACE = os.environ.get("TERMINAL_WORKSPACE", DEFAULT_WORKSPACE)
 
 # Ensure the workspace directory exists.
 if not os.path.exists(WORKSPACE):
-    logger.warning(f"Workspace directory '{WORKSPACE}' does not exist. Defaulting to current directory: {os.getcwd()}")
+    logger.warning("Workspace directory '%s' does not exist. Defaulting to current directory: %s", WORKSPACE, os.getcwd())
     WORKSPACE = os.getcwd()
 else:
     # Convert to absolute path for consistency
     WORKSPACE = os.path.abspath(WORKSPACE)
 
-def execute_command(command: str) -> str:
+# Maximum number of seconds a command may run before it is killed.
+COMMAND_TIMEOUT = 30
+
+# Maximum number of seconds to wait for a killed command to exit.
+KILL_TIMEOUT = 5
+
+# Maximum number of bytes kept from each of stdout and stderr.
+# Anything beyond this is read and discarded, so a command with a huge output
+# (e.g. 'find /') can't exhaust the server's memory.
+# It can be changed with the 'TERMINAL_MAX_OUTPUT_BYTES' environment variable.
+# Negative values are treated as 0 (keep no output at all), and values that
+# aren't a whole number fall back to DEFAULT_MAX_OUTPUT_BYTES.
+DEFAULT_MAX_OUTPUT_BYTES = 4 * 1024 * 1024
+try:
+    MAX_OUTPUT_BYTES = max(0, int(os.environ.get("TERMINAL_MAX_OUTPUT_BYTES", DEFAULT_MAX_OUTPUT_BYTES)))
+except ValueError:
+    logger.warning("TERMINAL_MAX_OUTPUT_BYTES='%s' is not a whole number. Defaulting to %s bytes.", os.environ["TERMINAL_MAX_OUTPUT_BYTES"], DEFAULT_MAX_OUTPUT_BYTES)
+    MAX_OUTPUT_BYTES = DEFAULT_MAX_OUTPUT_BYTES
+
+# Size of each read from the command's output pipes.
+READ_CHUNK_SIZE = 64 * 1024
+
+async def _read_limited(stream: asyncio.StreamReader) -> bytes:
+    """
+    Reads a stream until EOF, keeping at most MAX_OUTPUT_BYTES of it.
+    
+    The stream is always read to the end, even after the limit is reached.
+    Otherwise the command could block forever writing to a full pipe.
+    
+    Args:
+        stream (asyncio.StreamReader): The stdout or stderr pipe of the command.
+        
+    Returns:
+        bytes: The captured output, followed by a '[truncated]' marker if 
+               the output was longer than MAX_OUTPUT_BYTES.
+    """
+    buf = bytearray()
+    truncated = False
+    while chunk := await stream.read(READ_CHUNK_SIZE):
+        room = MAX_OUTPUT_BYTES - len(buf)
+        if len(chunk) > room:
+            truncated = True
+            chunk = chunk[:room]
+        if chunk:
+            buf.extend(chunk)
+    if truncated:
+        buf.extend(b"\n[truncated]")
+    return bytes(buf)
+
+async def _kill(proc: asyncio.subprocess.Process):
+    """
+    Kills a command that timed out, including any processes it started.
+    
+    Killing only the shell isn't enough: for a command like 'sleep 100' the
+    shell starts 'sleep' as a child process, which would keep running and
+    keep our output pipes open. On POSIX the command runs in its own process
+    group (see start_new_session below), so we kill the whole group.
+    
+    Args:
+        proc (asyncio.subprocess.Process): The timed out command.
+    """
+    try:
+        if platform.system() == "Windows":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        # The process (group) has already exited.
+        pass
+    
+    try:
+        # A process that left its group (e.g. with 'setsid') can still hold the
+        # pipes open, so we don't wait forever for it.
+        await asyncio.wait_for(proc.wait(), timeout=KILL_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Command (pid %s) did not exit within %s seconds after being killed.", proc.pid, KILL_TIMEOUT)
+
+async def execute_command(command: str) -> str:
     """
     Executes a shell command within the configured workspace and returns its output or error message.
     
@@ -43,35 +121,57 @@ def execute_command(command: str) -> str:
     # For this educational example, we execute the command as provided.
     
     try:
-        # We use subprocess.run to execute the command.
-        # - shell=True: Allows us to pass the command as a string.
-        # - capture_output=True: Catch stdout and stderr.
-        # - text=True: Return output as a string.
-        # - timeout=30: Prevent hanging.
+        # We use asyncio.create_subprocess_shell to execute the command.
+        # Unlike subprocess.run, it doesn't block the server's event loop,
+        # so other requests can be handled while the command is running.
+        # - stdout/stderr=PIPE: Catch stdout and stderr (up to MAX_OUTPUT_BYTES each).
         # - cwd=WORKSPACE: Run the command inside the defined workspace directory.
+        # - start_new_session: On POSIX, run the command in a new process group,
+        #   so it can be killed together with everything it started.
         
-        logger.info(f"Executing command: {command} (in {WORKSPACE})")
+        logger.info("Executing command: %s (in %s)", command, WORKSPACE)
         
-        result = subprocess.run(
+        proc = await asyncio.create_subprocess_shell(
             command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=WORKSPACE
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=WORKSPACE,
+            start_new_session=platform.system() != "Windows"
         )
         
+        async def collect_output():
+            # stdout and stderr are read at the same time, so neither pipe
+            # can fill up and block the command while we wait on the other.
+            output = await asyncio.gather(_read_limited(proc.stdout), _read_limited(proc.stderr))
+            await proc.wait()
+            return output
+        
+        try:
+            # COMMAND_TIMEOUT: Prevent hanging.
+            stdout, stderr = await asyncio.wait_for(collect_output(), timeout=COMMAND_TIMEOUT)
+        except BaseException:
+            # Whether the command timed out or the tool call was cancelled (e.g. the
+            # client cancelled the request or the server is shutting down), make
+            # sure the process doesn't keep running in the background.
+            await _kill(proc)
+            raise
+        
+        # The output is captured as raw bytes and decoded once here. Invalid
+        # UTF-8 (e.g. binary output) is replaced instead of raising an error.
+        out = (stdout or b"").decode("utf-8", errors="replace")
+        err = (stderr or b"").decode("utf-8", errors="replace")
+        
         # If the command was successful (return code 0)
-        if result.returncode == 0:
-            return result.stdout if result.stdout.strip() else "Command executed successfully with no output."
-        else:
-            # If the command failed, return the error message from stderr.
-            logger.error(f"Command failed with exit code {result.returncode}: {result.stderr}")
-            return f"Error (Exit Code {result.returncode}):\n{result.stderr}"
+        if proc.returncode == 0:
+            return out if out.strip() else "Command executed successfully with no output."
+        
+        # If the command failed, return the error message from stderr.
+        logger.error("Command failed with exit code %s: %s", proc.returncode, err)
+        return f"Error (Exit Code {proc.returncode}):\n{err}"
             
-    except subprocess.TimeoutExpired:
-        logger.error(f"Command timed out: {command}")
-        return f"Error: The command timed out after 30 seconds."
+    except asyncio.TimeoutError:
+        logger.error("Command timed out: %s", command)
+        return f"Error: The command timed out after {COMMAND_TIMEOUT} seconds."
     except Exception as e:
-        logger.exception(f"An unexpected error occurred while executing command: {command}")
+        logger.exception("An unexpected error occurred while executing command: %s", command)
         return f"An unexpected error occurred: {str(e)}"
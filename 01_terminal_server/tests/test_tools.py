@@ -0,0 +1,91 @@
+"""
+Tests for the Terminal MCP Server's tool logic.
+
+Run from the 01_terminal_server directory with: python -m unittest discover tests
+"""
+
+import asyncio
+import importlib
+import os
+import platform
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Make 'servers.terminal_server' importable when running from any directory.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from servers.terminal_server import tools
+
+
+class ExecuteCommandTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(tools, "WORKSPACE", self.workspace.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.workspace.cleanup)
+
+    async def test_returns_output(self):
+        self.assertEqual(await tools.execute_command("echo hello"), "hello\n")
+
+    @unittest.skipIf(platform.system() == "Windows", "uses POSIX shell commands")
+    async def test_long_output_is_truncated(self):
+        with mock.patch.object(tools, "MAX_OUTPUT_BYTES", 10):
+            result = await tools.execute_command("seq 1 100000")
+
+        self.assertEqual(result, "1\n2\n3\n4\n5\n\n[truncated]")
+
+    def test_negative_output_limit_is_clamped(self):
+        try:
+            with mock.patch.dict(os.environ, {"TERMINAL_MAX_OUTPUT_BYTES": "-1"}):
+                importlib.reload(tools)
+                self.assertEqual(tools.MAX_OUTPUT_BYTES, 0)
+        finally:
+            importlib.reload(tools)
+
+    def test_invalid_output_limit_falls_back_to_default(self):
+        try:
+            with mock.patch.dict(os.environ, {"TERMINAL_MAX_OUTPUT_BYTES": "4MB"}):
+                with self.assertLogs(tools.logger, "WARNING"):
+                    importlib.reload(tools)
+                self.assertEqual(tools.MAX_OUTPUT_BYTES, tools.DEFAULT_MAX_OUTPUT_BYTES)
+        finally:
+            importlib.reload(tools)
+
+    @unittest.skipIf(platform.system() == "Windows", "uses POSIX shell commands")
+    async def test_timeout_kills_processes_started_by_the_shell(self):
+        # The shell starts 'sleep' as a child process, which outlives the
+        # shell if only the shell is killed, and holds the output pipes open.
+        marker = os.path.join(self.workspace.name, "marker")
+        with mock.patch.object(tools, "COMMAND_TIMEOUT", 0.5):
+            start = time.monotonic()
+            result = await tools.execute_command("sleep 2 && touch marker")
+            elapsed = time.monotonic() - start
+
+        self.assertTrue(result.startswith("Error: The command timed out"), result)
+        self.assertLess(elapsed, 1.5)
+
+        # If 'sleep' survived, it would create the marker file after 2 seconds.
+        await asyncio.sleep(2)
+        self.assertFalse(os.path.exists(marker))
+
+    @unittest.skipIf(platform.system() == "Windows", "uses POSIX shell commands")
+    async def test_cancellation_kills_the_command(self):
+        marker = os.path.join(self.workspace.name, "marker")
+        task = asyncio.create_task(tools.execute_command("sleep 2 && touch marker"))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        # If the command survived the cancellation, it would create the marker file.
+        await asyncio.sleep(2)
+        self.assertFalse(os.path.exists(marker))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,17 +24,23 @@ from mcp_client.manager import MCPClientManager
 
 # --- INITIALIZATION ---
 
+# Consoles are created once and reused: one for program output (stdout)
+# and one for log messages (stderr).
+console = Console()
+err_console = Console(stderr=True)
+
+# Inputs that end the interactive loop (compared in lower case).
+_EXIT_SET = frozenset({"exit", "quit"})
+
 # Setup logging to stderr using Rich
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(rich_tracebacks=True, console=Console(stderr=True))]
+        handlers=[RichHandler(rich_tracebacks=True, console=err_console)]
     )
 
-console = Console()
-
 async def main():
     setup_logging()
     
@@ -52,7 +58,7 @@ async def main():
     try:
         # 1. LOAD CONFIGURATION
         console.print("[yellow]Loading configuration...[/yellow]")
-        manager.load_config()
+        await manager.load_config()
 
         # 2. CONNECT TO SERVERS
         console.print("[yellow]Connecting to MCP servers...[/yellow]")
@@ -73,8 +79,10 @@ async def main():
             table.add_column("Name", style="cyan")
             table.add_column("Description")
             
-            for tool in tools:
-                table.add_row(tool.name, tool.description or "No description")
+            # Collect the plain-text rows first, then hand them to the table.
+            rows = [(tool.name, tool.description or "No description") for tool in tools]
+            for name, description in rows:
+                table.add_row(name, description)
             
             console.print(table)
 
@@ -83,13 +91,13 @@ async def main():
         
         while True:
             # Ask the user what they want to echo
-            user_input = Prompt.ask("[bold blue]Enter text to echo (or 'exit' to quit)[/bold blue]")
+            user_input = Prompt.ask("[bold blue]Enter text to echo (or 'exit' to quit)[/bold blue]").strip()
             
-            if user_input.lower() in ["exit", "quit"]:
-                break
-            
-            if not user_input.strip():
+            if not user_input:
                 continue
+            
+            if user_input.lower() in _EXIT_SET:
+                break
 
             try:
                 console.print(f"[cyan]Calling 'echo_tool' with argument: '{user_input}'...[/cyan]")
@@ -130,8 +138,18 @@ async def main():
         console.print("[bold cyan]Goodbye![/bold cyan]")
 
 if __name__ == "__main__":
+    # uvloop is a faster drop-in replacement for asyncio's event loop, which
+    # helps when many server pipes are being read and written at once.
+    # It isn't available on Windows, so we fall back to the standard loop.
+    # uvloop.run only exists in uvloop 0.18 and later; older versions fall back too.
+    try:
+        import uvloop
+        run = uvloop.run
+    except (ImportError, AttributeError):
+        run = asyncio.run
+
     # Ensure the script runs within an async loop
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         pass # Handle Ctrl+C gracefully
@@ -10,6 +10,7 @@ This manager demonstrates:
 2.  **Lifecycle Management**: Using `AsyncExitStack` to ensure all connections are properly closed.
 3.  **Tool Discovery**: How a client 'asks' a server what capabilities it has.
 4.  **Multiplexing**: Connecting to and managing multiple servers simultaneously.
+5.  **Result Caching**: Reusing results of tools that config.json marks as cacheable.
 """
 
 import asyncio
@@ -17,9 +18,17 @@ import json
 import logging
 import sys
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple, Union
 from contextlib import AsyncExitStack, asynccontextmanager
 
+# orjson is an optional, faster JSON parser. We fall back to the standard
+# library's json module if it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import anyio
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 import mcp.types as types
@@ -33,36 +42,67 @@ class MCPClientManager:
     Students: This class acts as the 'bridge' between your application 
     logic and the external MCP server processes.
     """
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, cache_size: int = 128):
         self.config_path = config_path
         self.sessions: Dict[str, ClientSession] = {}
-        # AsyncExitStack is a powerful tool to manage multiple async context managers.
-        # It ensures that even if one connection fails, others are cleaned up correctly.
-        self.exit_stack = AsyncExitStack()
-        self._server_params: Dict[str, StdioServerParameters] = {}
+        # Maps server name -> (how to start it, the command line used in log messages).
+        self._server_params: Dict[str, Tuple[StdioServerParameters, str]] = {}
+        # Each server connection lives in its own task (see `_connect_one`),
+        # which holds the connection open until `_closing` is set.
+        self._server_tasks: List[asyncio.Task] = []
+        self._closing = asyncio.Event()
+        # Tool discovery results are cached so that calling a tool doesn't need
+        # a 'list_tools' round trip to every server just to find its owner.
+        self._tool_index: Dict[str, ClientSession] = {}
+        self._tools_cache: List[types.Tool] = []
+        # Results of cacheable tools, keyed by (tool name, arguments).
+        # Caching is opted into per server with a 'cacheableTools' list in config.json.
+        self.cache_size = cache_size
+        self._server_cacheable_tools: Dict[str, Set[str]] = {}
+        self._cacheable_tools: Set[str] = set()
+        self._result_cache: Dict[Tuple[str, Tuple], types.CallToolResult] = {}
+        # Increased on every invalidation, so calls that were still in flight
+        # at that moment don't put their (possibly stale) results back.
+        self._cache_generation = 0
+
+    async def load_config(self):
+        """
+        Loads the MCP server configurations from config.json.
+        
+        Reading a file blocks, so the actual work is done in a worker thread
+        to keep the event loop free in the meantime.
+        """
+        await asyncio.to_thread(self._load_config_sync)
 
-    def load_config(self):
-        """Loads the MCP server configurations from config.json."""
+    def _load_config_sync(self):
+        """Reads and parses config.json. Runs in a worker thread (see `load_config`)."""
         if not os.path.exists(self.config_path):
-            logger.error(f"Config file not found: {self.config_path}")
+            logger.error("Config file not found: %s", self.config_path)
             raise FileNotFoundError(f"Config file {self.config_path} not found.")
 
         try:
-            with open(self.config_path, 'r') as f:
-                config = json.load(f)
-                servers = config.get("mcpServers", {})
-                for name, info in servers.items():
-                    # StdioServerParameters defines HOW to start the server process.
-                    self._server_params[name] = StdioServerParameters(
-                        command=info["command"],
-                        args=info.get("args", []),
-                        env=info.get("env")
-                    )
+            # The file is read as bytes, which both parsers accept directly.
+            with open(self.config_path, 'rb') as f:
+                data = f.read()
+            # orjson.JSONDecodeError is a subclass of json.JSONDecodeError,
+            # so the handler below covers both parsers.
+            config = orjson.loads(data) if orjson else json.loads(data)
+            servers = config.get("mcpServers", {})
+            for name, info in servers.items():
+                # StdioServerParameters defines HOW to start the server process.
+                params = StdioServerParameters(
+                    command=info["command"],
+                    args=info.get("args", []),
+                    env=info.get("env")
+                )
+                self._server_params[name] = (params, f"{params.command} {' '.join(params.args)}")
+                # Tools whose results may be reused for identical arguments.
+                self._server_cacheable_tools[name] = set(info.get("cacheableTools", []))
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse config JSON: {e}")
+            logger.error("Failed to parse config JSON: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Failed to load config: {e}")
+            logger.error("Failed to load config: %s", e)
             raise
 
     async def connect_to_all(self):
@@ -70,26 +110,115 @@ class MCPClientManager:
         Connects to all configured MCP servers.
         
         This method spawns the server processes and establishes JSON-RPC sessions.
+        All servers are started concurrently, so the total startup time is that
+        of the slowest server rather than the sum of all of them.
+        It can be called again after `shutdown()` to reconnect, but not while
+        still connected.
         """
-        for name, params in self._server_params.items():
-            try:
-                logger.info(f"Connecting to MCP server '{name}' using command: {params.command} {' '.join(params.args)}")
+        if any(not task.done() for task in self._server_tasks):
+            raise RuntimeError("Already connected to the MCP servers. Call shutdown() before connecting again.")
+        self._server_tasks.clear()
+
+        # A previous shutdown() leaves the event set; clear it so the new
+        # connections stay open.
+        self._closing.clear()
+        loop = asyncio.get_running_loop()
+        ready_futures = []
+        for name, (params, cmdline) in self._server_params.items():
+            ready = loop.create_future()
+            self._server_tasks.append(asyncio.create_task(self._connect_one(name, params, cmdline, ready)))
+            ready_futures.append(ready)
+
+        # Wait until every server has either connected or failed.
+        await asyncio.gather(*ready_futures)
+
+        # Keep sessions in config order, regardless of which server answered first.
+        self.sessions = {name: self.sessions[name] for name in self._server_params if name in self.sessions}
+        await self.refresh_tools()
+
+    async def _connect_one(self, name: str, params: StdioServerParameters, cmdline: str, ready: asyncio.Future):
+        """
+        Connects to a single MCP server and keeps the connection open until shutdown.
+
+        Students: The transport and session are async context managers backed by
+        anyio task groups, which must be exited by the same task that entered them.
+        That's why each server gets its own task and its own AsyncExitStack.
+        AsyncExitStack makes sure that whatever was entered is closed again, in
+        reverse order, even if a later step fails.
+        """
+        session = None
+        try:
+            async with AsyncExitStack() as stack:
+                logger.info("Connecting to MCP server '%s' using command: %s", name, cmdline)
                 
                 # stdio_client creates the transport layer (pipes to the process).
-                transport = await self.exit_stack.enter_async_context(stdio_client(params))
+                transport = await stack.enter_async_context(stdio_client(params))
                 read, write = transport
                 
                 # ClientSession creates the protocol layer (handling JSON-RPC messages).
-                session = await self.exit_stack.enter_async_context(ClientSession(read, write))
+                session = await stack.enter_async_context(ClientSession(read, write))
                 
                 # 'initialize' is a required step in the MCP protocol handshake.
                 await session.initialize()
                 self.sessions[name] = session
-                logger.info(f"Successfully connected to MCP server: {name}")
-            except Exception as e:
+                logger.info("Successfully connected to MCP server: %s", name)
+                ready.set_result(None)
+
+                # Hold the connection open until shutdown() is called.
+                await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
                 # We log warning but don't crash, allowing other servers to work.
-                logger.warning(f"Ignoring server '{name}' because we were not able to connect to it: {e}")
-                logger.debug(f"Command attempted: {params.command} {' '.join(params.args)}")
+                logger.warning("Ignoring server '%s' because we were not able to connect to it: %s", name, e)
+                logger.debug("Command attempted: %s", cmdline)
+            else:
+                logger.error("Error while closing connection to MCP server '%s': %s", name, e)
+        finally:
+            # A closed session must not be used anymore.
+            if session is not None and self.sessions.get(name) is session:
+                del self.sessions[name]
+            if not ready.done():
+                ready.set_result(None)
+
+    async def refresh_tools(self):
+        """
+        (Re-)discovers the tools offered by every connected server.
+
+        Students: Discovery happens once after connecting. The results are
+        remembered in a 'tool name -> session' index, so later tool calls
+        can go straight to the right server. Call this again if a server's
+        tools may have changed.
+        """
+        # Request the list of tools from every server at the same time.
+        results = await asyncio.gather(
+            *(session.list_tools() for session in self.sessions.values()),
+            return_exceptions=True
+        )
+
+        tool_index: Dict[str, ClientSession] = {}
+        tools_cache: List[types.Tool] = []
+        cacheable_tools: Set[str] = set()
+        for (name, session), result in zip(self.sessions.items(), results):
+            if isinstance(result, Exception):
+                logger.error("Failed to list tools for %s: %s", name, result)
+                continue
+            for tool in result.tools:
+                tools_cache.append(tool)
+                # If two servers expose the same tool name, the first one wins.
+                if tool.name in tool_index:
+                    continue
+                tool_index[tool.name] = session
+                # Only the client's config decides what is cached. Servers can
+                # describe their tools with annotations, but those are hints about
+                # side effects, not a promise that the same input gives the same
+                # output, and they can't be trusted from unknown servers.
+                if tool.name in self._server_cacheable_tools.get(name, ()):
+                    cacheable_tools.add(tool.name)
+        self._tool_index = tool_index
+        self._tools_cache = tools_cache
+        self._cacheable_tools = cacheable_tools
+        # The tools may have changed, so previously cached results can't be trusted.
+        self.invalidate_cache()
 
     async def list_all_tools(self) -> List[types.Tool]:
         """
@@ -97,42 +226,147 @@ class MCPClientManager:
         
         Students: This is how the agent 'sees' what it can do. 
         Each server returns a list of its tools, and we combine them.
+        The combined list is cached by `refresh_tools`.
         """
-        all_tools = []
-        for name, session in self.sessions.items():
-            try:
-                # Request the list of tools from the server via the session.
-                result = await session.list_tools()
-                for tool in result.tools:
-                    all_tools.append(tool)
-            except Exception as e:
-                logger.error(f"Failed to list tools for {name}: {e}")
-        return all_tools
+        return self._tools_cache
 
     async def call_tool(self, tool_name: str, arguments: dict) -> types.CallToolResult:
         """
         Calls a tool on the appropriate server.
         
-        It searches through active sessions to find which server owns the tool.
+        The owning server is looked up in the tool index built by `refresh_tools`.
+        Results of cacheable tools are remembered, so repeating a call with the
+        same arguments doesn't need another round trip to the server.
+        
+        Raises:
+            ValueError: No connected server offers the tool.
+            ConnectionError: The connection to the server was lost (e.g. the
+                server process crashed). The server is removed from the manager.
         """
-        for server_name, session in self.sessions.items():
-            try:
-                tools_result = await session.list_tools()
-                if any(t.name == tool_name for t in tools_result.tools):
-                    # We found the server that has the tool. Execute it!
-                    return await session.call_tool(tool_name, arguments)
-            except Exception as e:
-                logger.warning(f"Error checking tools on server {server_name}: {e}")
-                continue
+        session = self._tool_index.get(tool_name)
+        if session is None:
+            raise ValueError(f"Tool {tool_name} not found on any active server session.")
+
+        if tool_name not in self._cacheable_tools or self.cache_size <= 0:
+            return await self._send(session, tool_name, arguments)
+
+        key = self._cache_key(tool_name, arguments)
+        cached = self._result_cache.pop(key, None)
+        if cached is not None:
+            # Re-inserting moves the entry to the end, marking it as most recently used.
+            self._result_cache[key] = cached
+            # Every caller gets its own copy, so changing a result can't change the cache.
+            return cached.model_copy(deep=True)
+
+        generation = self._cache_generation
+        result = await self._send(session, tool_name, arguments)
+        if result.isError or generation != self._cache_generation:
+            # Errors may be temporary, so they are never cached. Neither are results
+            # of calls that were in flight while the cache was invalidated.
+            return result
+        if key not in self._result_cache and len(self._result_cache) >= self.cache_size:
+            # Evict the least recently used entry (the first one in the dict).
+            del self._result_cache[next(iter(self._result_cache))]
+        self._result_cache[key] = result
+        return result.model_copy(deep=True)
+
+    async def _send(self, session: ClientSession, tool_name: str, arguments: dict) -> types.CallToolResult:
+        """Sends a tool call to a session, and drops the session if its connection is gone."""
+        try:
+            return await session.call_tool(tool_name, arguments)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+            # The pipes to the server are closed, e.g. because the server process died.
+            await self._drop_session(session)
+            raise ConnectionError(f"Lost connection to the MCP server providing {tool_name}.") from e
+
+    async def _drop_session(self, session: ClientSession):
+        """Forgets a session whose connection was lost, and the tools it offered."""
+        names = [name for name, s in self.sessions.items() if s is session]
+        if not names:
+            # Another call already noticed the lost connection.
+            return
+        for name in names:
+            logger.error("Lost connection to MCP server '%s'. Its tools are no longer available.", name)
+            del self.sessions[name]
+        # Rebuild the tool index from the remaining servers. If another server
+        # offers a tool with the same name, calls now go there.
+        await self.refresh_tools()
+
+    async def call_tools(self, calls: List[Tuple[str, dict]]) -> List[Union[types.CallToolResult, Exception]]:
+        """
+        Calls several tools at once.
+        
+        Students: A JSON-RPC request carries an 'id', so a client doesn't have to
+        wait for one response before sending the next request. All calls are sent
+        right away and the server's responses are matched up as they arrive,
+        so a batch costs about one round trip instead of one per call.
+        
+        Args:
+            calls: A list of (tool_name, arguments) pairs.
         
-        raise ValueError(f"Tool {tool_name} not found on any active server session.")
+        Returns:
+            One entry per call, in the same order as `calls`: the tool's result,
+            or the exception that call raised (e.g. ValueError for an unknown tool).
+            A failing call doesn't affect the others.
+        """
+        return await asyncio.gather(
+            *(self.call_tool(name, arguments) for name, arguments in calls),
+            return_exceptions=True
+        )
+
+    def invalidate_cache(self, tool_name: Optional[str] = None):
+        """
+        Forgets cached tool results.
+        
+        Args:
+            tool_name: Only forget results of this tool. If omitted, the whole cache is cleared.
+        """
+        self._cache_generation += 1
+        if tool_name is None:
+            self._result_cache.clear()
+            return
+        for key in [key for key in self._result_cache if key[0] == tool_name]:
+            del self._result_cache[key]
+
+    @staticmethod
+    def _cache_key(tool_name: str, arguments: Optional[dict]) -> Tuple[str, Tuple]:
+        """
+        Builds a hashable cache key from a tool name and its arguments.
+        
+        Each value is tagged with its type, so that e.g. 1, 1.0 and True, or the
+        list [1, 2] and the string "[1, 2]", don't share a cache entry.
+        """
+        items = []
+        for name, value in sorted((arguments or {}).items()):
+            value_type = type(value).__name__
+            try:
+                hash(value)
+            except TypeError:
+                # Lists and dicts aren't hashable, so we use their JSON text instead.
+                # JSON keeps nested types apart too: [1], [1.0] and [true] differ.
+                value = json.dumps(value, sort_keys=True, default=str)
+            items.append((name, value_type, value))
+        return tool_name, tuple(items)
 
     async def shutdown(self):
         """
         Closes all sessions and transports gracefully.
         
-        Closing the exit_stack will trigger the __aexit__ methods of all 
-        registered context managers in reverse order.
+        Each server task closes its own transport and session once `_closing`
+        is set, so all servers are shut down in parallel. Discovered tools and
+        cached results are forgotten, since they belong to the closed sessions.
         """
-        await self.exit_stack.aclose()
+        self._closing.set()
+        try:
+            # One server failing to close must not keep the others from closing.
+            results = await asyncio.gather(*self._server_tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.error("Error while closing an MCP server connection: %s", result)
+        finally:
+            self._server_tasks.clear()
+            self._tool_index = {}
+            self._tools_cache = []
+            self._cacheable_tools = set()
+            self.invalidate_cache()
         logger.info("MCP connections closed.")
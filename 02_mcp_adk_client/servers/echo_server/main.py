@@ -51,7 +51,7 @@ def echo_tool(text: str) -> str:
         text: The text to be echoed.
     """
     # We log tool execution to stderr for visibility during development and debugging.
-    logger.info(f"Tool 'echo_tool' called with text: {text}")
+    logger.info("Tool 'echo_tool' called with text: %s", text)
     
     # We delegate the actual logic to a function in the 'tools.py' module.
     # This keeps our entry point clean and separates protocol logic from business logic.
@@ -0,0 +1,254 @@
+"""
+Tests for the low-level MCPClientManager.
+
+These tests replace real server sessions with StubSession, so no server
+processes are started.
+
+Run from the 02_mcp_adk_client directory with: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+import anyio
+import mcp.types as types
+
+# Make 'mcp_client' importable when running from any directory.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mcp_client.manager import MCPClientManager
+
+
+class StubSession:
+    """
+    Stands in for a connected mcp.ClientSession.
+
+    Every tool answers with a text block "<server>:<tool>:<call number>",
+    so tests can tell which server handled a call and whether it was repeated.
+    """
+
+    def __init__(self, server, tool_names, fail_list_tools=False):
+        self.server = server
+        self.tools = [types.Tool(name=name, inputSchema={"type": "object"}) for name in tool_names]
+        self.fail_list_tools = fail_list_tools
+        self.calls = []
+        self.error_tools = set()
+        # Set to True to simulate a server process that has died.
+        self.closed = False
+        # If set, calls wait for this event before answering.
+        self.gate = None
+
+    async def list_tools(self):
+        if self.fail_list_tools:
+            raise RuntimeError(f"{self.server} is broken")
+        return types.ListToolsResult(tools=self.tools)
+
+    async def call_tool(self, name, arguments):
+        if self.closed:
+            raise anyio.ClosedResourceError()
+        self.calls.append((name, arguments))
+        if self.gate is not None:
+            await self.gate.wait()
+        text = f"{self.server}:{name}:{len(self.calls)}"
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=text)],
+            isError=name in self.error_tools
+        )
+
+
+class ManagerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class that builds a manager connected to stub sessions."""
+
+    async def make_manager(self, sessions, cacheable_tools=None, **kwargs):
+        """
+        Builds a manager connected to `sessions` (server name -> StubSession).
+        `cacheable_tools` maps server names to their 'cacheableTools' config.
+        """
+        manager = MCPClientManager("unused-config.json", **kwargs)
+        manager.sessions = dict(sessions)
+        manager._server_cacheable_tools = {name: set(tools) for name, tools in (cacheable_tools or {}).items()}
+        await manager.refresh_tools()
+        return manager
+
+    @staticmethod
+    def text(result):
+        return result.content[0].text
+
+
+class ToolDispatchTest(ManagerTestCase):
+
+    async def test_calls_go_to_the_server_that_owns_the_tool(self):
+        a = StubSession("a", ["tool_a"])
+        b = StubSession("b", ["tool_b"])
+        manager = await self.make_manager({"a": a, "b": b})
+
+        self.assertEqual(self.text(await manager.call_tool("tool_b", {})), "b:tool_b:1")
+        self.assertEqual(a.calls, [])
+
+    async def test_unknown_tool_raises_value_error(self):
+        manager = await self.make_manager({"a": StubSession("a", ["tool_a"])})
+
+        with self.assertRaises(ValueError):
+            await manager.call_tool("missing", {})
+
+    async def test_first_server_wins_for_duplicate_tool_names(self):
+        a = StubSession("a", ["shared"])
+        b = StubSession("b", ["shared"])
+        manager = await self.make_manager({"a": a, "b": b})
+
+        self.assertEqual(self.text(await manager.call_tool("shared", {})), "a:shared:1")
+        # Both copies are still listed.
+        self.assertEqual([tool.name for tool in await manager.list_all_tools()], ["shared", "shared"])
+
+    async def test_server_failing_to_list_tools_is_skipped(self):
+        broken = StubSession("broken", ["tool_x"], fail_list_tools=True)
+        b = StubSession("b", ["tool_b"])
+        with self.assertLogs("mcp-client-manager", "ERROR"):
+            manager = await self.make_manager({"broken": broken, "b": b})
+
+        self.assertEqual([tool.name for tool in await manager.list_all_tools()], ["tool_b"])
+        with self.assertRaises(ValueError):
+            await manager.call_tool("tool_x", {})
+
+
+class ConnectionLifecycleTest(ManagerTestCase):
+
+    async def test_lost_session_is_dropped_and_calls_fall_back_to_other_servers(self):
+        a = StubSession("a", ["shared", "only_a"])
+        b = StubSession("b", ["shared"])
+        manager = await self.make_manager({"a": a, "b": b})
+        a.closed = True
+
+        with self.assertLogs("mcp-client-manager", "ERROR"):
+            with self.assertRaises(ConnectionError):
+                await manager.call_tool("shared", {})
+
+        self.assertEqual(list(manager.sessions), ["b"])
+        self.assertEqual(self.text(await manager.call_tool("shared", {})), "b:shared:1")
+        with self.assertRaises(ValueError):
+            await manager.call_tool("only_a", {})
+
+    async def test_shutdown_forgets_tools_and_cached_results(self):
+        a = StubSession("a", ["tool_a"])
+        manager = await self.make_manager({"a": a}, cacheable_tools={"a": ["tool_a"]})
+        await manager.call_tool("tool_a", {})
+
+        await manager.shutdown()
+
+        self.assertEqual(await manager.list_all_tools(), [])
+        self.assertEqual(manager._result_cache, {})
+        with self.assertRaises(ValueError):
+            await manager.call_tool("tool_a", {})
+
+    async def test_connecting_twice_without_shutdown_is_rejected(self):
+        manager = MCPClientManager("unused-config.json")
+        running = asyncio.create_task(asyncio.sleep(10))
+        self.addCleanup(running.cancel)
+        manager._server_tasks.append(running)
+
+        with self.assertRaises(RuntimeError):
+            await manager.connect_to_all()
+
+
+
+class ResultCacheTest(ManagerTestCase):
+
+    async def asyncSetUp(self):
+        self.session = StubSession("a", ["cached", "other", "uncached"])
+        self.manager = await self.make_manager(
+            {"a": self.session},
+            cacheable_tools={"a": ["cached", "other"]},
+            cache_size=2
+        )
+
+    async def call(self, tool_name="cached", **arguments):
+        return self.text(await self.manager.call_tool(tool_name, arguments))
+
+    def test_cache_keys_tell_argument_types_apart(self):
+        key = MCPClientManager._cache_key
+        self.assertEqual(len({key("t", {"a": 1}), key("t", {"a": 1.0}), key("t", {"a": True})}), 3)
+        self.assertNotEqual(key("t", {"a": [1, 2]}), key("t", {"a": "[1, 2]"}))
+        self.assertNotEqual(key("t", {"a": [1]}), key("t", {"a": [True]}))
+        self.assertEqual(key("t", {"a": 1, "b": [2]}), key("t", {"b": [2], "a": 1}))
+
+    async def test_repeated_calls_are_served_from_the_cache(self):
+        self.assertEqual(await self.call(x=1), "a:cached:1")
+        self.assertEqual(await self.call(x=1), "a:cached:1")
+        self.assertEqual(await self.call(x=2), "a:cached:2")
+
+    async def test_only_configured_tools_are_cached(self):
+        await self.call("uncached")
+        self.assertEqual(await self.call("uncached"), "a:uncached:2")
+
+    async def test_least_recently_used_entry_is_evicted(self):
+        await self.call(x=1)
+        await self.call(x=2)
+        await self.call(x=1)  # x=1 is now the most recently used entry.
+        await self.call(x=3)  # The cache is full, so x=2 is evicted.
+
+        self.assertEqual(await self.call(x=1), "a:cached:1")
+        self.assertEqual(await self.call(x=2), "a:cached:4")
+
+    async def test_error_results_are_not_cached(self):
+        self.session.error_tools.add("cached")
+        await self.call()
+        self.assertEqual(await self.call(), "a:cached:2")
+
+    async def test_invalidate_cache_for_one_tool(self):
+        await self.call("cached")
+        await self.call("other")
+
+        self.manager.invalidate_cache("cached")
+
+        self.assertEqual(await self.call("cached"), "a:cached:3")
+        self.assertEqual(await self.call("other"), "a:other:2")
+
+    async def test_changing_a_result_does_not_change_the_cache(self):
+        first = await self.manager.call_tool("cached", {})
+        first.content[0].text = "changed"
+        second = await self.manager.call_tool("cached", {})
+        second.content[0].text = "changed again"
+
+        self.assertEqual(await self.call(), "a:cached:1")
+
+    async def test_call_in_flight_during_invalidation_is_not_cached(self):
+        self.session.gate = asyncio.Event()
+        in_flight = asyncio.create_task(self.manager.call_tool("cached", {}))
+        await asyncio.sleep(0)
+
+        self.manager.invalidate_cache()
+        self.session.gate.set()
+        self.assertEqual(self.text(await in_flight), "a:cached:1")
+
+        self.assertEqual(await self.call(), "a:cached:2")
+
+
+
+class CallToolsTest(ManagerTestCase):
+
+    async def test_results_keep_call_order_and_failures_are_isolated(self):
+        slow = StubSession("slow", ["slow_tool"])
+        slow.gate = asyncio.Event()
+        fast = StubSession("fast", ["fast_tool"])
+        manager = await self.make_manager({"slow": slow, "fast": fast})
+
+        batch = asyncio.create_task(manager.call_tools([
+            ("slow_tool", {}),
+            ("missing", {}),
+            ("fast_tool", {}),
+        ]))
+        # Let every call start; the fast one finishes while the slow one waits.
+        await asyncio.sleep(0)
+        slow.gate.set()
+        results = await batch
+
+        self.assertEqual(self.text(results[0]), "slow:slow_tool:1")
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(self.text(results[2]), "fast:fast_tool:1")
+
+
+
+if __name__ == "__main__":
+    unittest.main()